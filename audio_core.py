@@ -0,0 +1,380 @@
+import os
+import sys
+import shutil
+import threading
+import subprocess
+import tempfile
+from math import gcd
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly, sosfilt
+import av  # PyAV
+
+# ================= CONFIGURATION =================
+SAMPLE_RATE = 48000
+DEFAULT_INPUT_FOLDER = "Source_Audio"
+SUPPORTED_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac', '.m4a', '.wma', '.aac', '.alac', '.aiff')
+DECODE_HINT_SECONDS = 60  # Initial buffer size when the decoded length is not known up front
+POOL_MAX_FREE = 4  # Decode buffers kept around for reuse
+POOL_MAX_BYTES = 512 * 1024 * 1024  # Upper bound on the memory those buffers may hold
+NATIVE_SUBTYPES = ('PCM_16', 'FLOAT')  # Files already in these at SAMPLE_RATE skip ffmpeg
+# =================================================
+
+# Optional system FFmpeg: piping PCM from it is much faster than decoding with PyAV
+FFMPEG = shutil.which("ffmpeg")
+
+def signal_handler(sig, frame):
+    print("\n\n" + "!" * 40)
+    print(" Process interrupted by user. Exiting...")
+    print("!" * 40 + "\n")
+    sys.exit(0)
+
+def print_separator():
+    print("\n" + "=" * 60 + "\n", flush=True)
+
+_EXTENSION_SET = frozenset(SUPPORTED_EXTENSIONS)
+
+def is_supported(path):
+    """True if the file extension is one of SUPPORTED_EXTENSIONS."""
+    # Only the suffix is lowercased; cheaper than os.path.splitext for large folders
+    return path[path.rfind('.'):].lower() in _EXTENSION_SET
+
+def list_audio_files(directory):
+    """Return the paths of all supported audio files in `directory`."""
+    # scandir's DirEntry caches the file type, so is_file() costs no extra stat
+    with os.scandir(directory) as it:
+        return [e.path for e in it if is_supported(e.name) and e.is_file()]
+
+class BufferPool:
+    """Recycles float32 (frames, 2) buffers between files.
+
+    Decoding into a reused buffer and normalizing it in place means a batch
+    does not allocate (and page-fault in) a fresh full-length array per file.
+    """
+
+    def __init__(self, max_free=POOL_MAX_FREE, max_bytes=POOL_MAX_BYTES):
+        self._free = []
+        self._max_free = max_free
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def acquire(self, nframes):
+        """Return a buffer with room for at least `nframes` frames."""
+        with self._lock:
+            best = None
+            for i, slab in enumerate(self._free):
+                if len(slab) >= nframes and (best is None or len(slab) < len(self._free[best])):
+                    best = i
+            if best is not None:
+                return self._free.pop(best)
+        return np.empty((max(nframes, 1), 2), dtype=np.float32)
+
+    def grow(self, slab, filled, nframes):
+        """Swap `slab` for a buffer of at least `nframes`, keeping its first `filled` frames."""
+        bigger = self.acquire(nframes)
+        bigger[:filled] = slab[:filled]
+        # The outgrown slab is dropped, not pooled: keeping every doubling step
+        # would hold about twice the final buffer between batches.
+        return bigger
+
+    def release(self, buf):
+        """Hand back a buffer from acquire(), or any view of one."""
+        slab = buf if buf.base is None else buf.base
+        if not isinstance(slab, np.ndarray) or slab.dtype != np.float32 or slab.shape[1:] != (2,):
+            return
+        if slab.nbytes > self._max_bytes:
+            return
+        with self._lock:
+            self._free.append(slab)
+            while (len(self._free) > self._max_free
+                   or sum(b.nbytes for b in self._free) > self._max_bytes):
+                # Keep the largest buffers: they can serve any file.
+                # (Index-based: list.remove() would compare arrays with ==.)
+                smallest = min(range(len(self._free)), key=lambda i: len(self._free[i]))
+                del self._free[smallest]
+
+buffer_pool = BufferPool()
+
+def k_weighting_sos(rate):
+    """ITU-R BS.1770 K-weighting for `rate` as a second-order-section cascade.
+
+    A high-shelf "head" filter followed by the RLB high-pass, both applied in a
+    single sosfilt pass. At 48 kHz this reproduces the coefficients in the spec.
+    """
+    # High shelf
+    K = np.tan(np.pi * 1681.974450955533 / rate)
+    Q = 0.7071752369554196
+    Vh = 10 ** (3.999843853973347 / 20)
+    Vb = Vh ** 0.4996667741545416
+    a0 = 1 + K / Q + K * K
+    shelf = [(Vh + Vb * K / Q + K * K) / a0, 2 * (K * K - Vh) / a0, (Vh - Vb * K / Q + K * K) / a0,
+             1.0, 2 * (K * K - 1) / a0, (1 - K / Q + K * K) / a0]
+    # High pass
+    K = np.tan(np.pi * 38.13547087602444 / rate)
+    Q = 0.5003270373238773
+    a0 = 1 + K / Q + K * K
+    highpass = [1.0, -2.0, 1.0, 1.0, 2 * (K * K - 1) / a0, (1 - K / Q + K * K) / a0]
+    return np.array([shelf, highpass])
+
+K_WEIGHTING_SOS = k_weighting_sos(SAMPLE_RATE)
+
+_info_cache = {}
+
+def probe(path):
+    """soundfile header info for `path`, or None if libsndfile can't open it.
+
+    Memoized on (path, mtime, size) so repeated batches don't re-read headers.
+    """
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _info_cache:
+        try:
+            _info_cache[key] = sf.info(path)
+        except RuntimeError:  # Not a format libsndfile reads (mp3, m4a, ...)
+            _info_cache[key] = None
+    return _info_cache[key]
+
+def is_native(path, sr=SAMPLE_RATE):
+    """True if `path` is already `sr` mono/stereo PCM_16 or float and needs no resampling."""
+    info = probe(path)
+    return (info is not None and info.samplerate == sr
+            and info.channels in (1, 2) and info.subtype in NATIVE_SUBTYPES)
+
+def _read_native(path, nframes):
+    """Read a file that passed is_native() straight into a pooled stereo buffer."""
+    slab = buffer_pool.acquire(nframes)
+    with sf.SoundFile(path) as f:
+        if f.channels == 2:
+            n = len(f.read(out=slab[:nframes]))
+        else:
+            # Upmix like ffmpeg's -ac 2, a second at a time: no full-length mono copy
+            block = np.empty((f.samplerate, 1), dtype=np.float32)
+            n = 0
+            for chunk in f.blocks(out=block, frames=nframes):
+                slab[n:n + len(chunk)] = chunk
+                n += len(chunk)
+    return slab[:n]
+
+def _read_pcm(stream, hint_frames):
+    """Read interleaved f32le stereo from `stream` into a pooled buffer."""
+    slab = buffer_pool.acquire(hint_frames)
+    filled = 0  # bytes
+    while True:
+        view = memoryview(slab).cast('B')
+        if filled == len(view):
+            slab = buffer_pool.grow(slab, filled // 8, 2 * len(slab))
+            continue
+        n = stream.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return slab[:filled // 8]
+
+def _ffmpeg_decoder(path, sr, stderr):
+    """Start FFmpeg decoding `path` to interleaved f32le stereo at `sr` on its stdout."""
+    return subprocess.Popen(
+        [FFMPEG, "-nostdin", "-v", "error", "-i", path,
+         "-f", "f32le", "-ar", str(sr), "-ac", "2", "pipe:1"],
+        stdout=subprocess.PIPE, stderr=stderr,
+    )
+
+def _ffmpeg_error(err):
+    err.seek(0)
+    return RuntimeError(err.read().decode(errors="replace").strip() or "ffmpeg failed")
+
+def decode_to_array(path, sr=SAMPLE_RATE):
+    """Decode an audio file to a float32 stereo array of shape (frames, 2) at `sr`.
+
+    The array is a view into a `buffer_pool` buffer; release it when done.
+    """
+    if is_native(path, sr):
+        # Already at the target rate: read it directly, no decoder process
+        return _read_native(path, probe(path).frames)
+
+    if FFMPEG:
+        # One subprocess, raw PCM straight into memory -- no WAV written to disk.
+        # stderr goes to a file so a chatty ffmpeg can never fill a pipe and stall.
+        with tempfile.TemporaryFile() as err:
+            with _ffmpeg_decoder(path, sr, err) as proc:
+                audio = _read_pcm(proc.stdout, DECODE_HINT_SECONDS * sr)
+            if proc.returncode != 0:
+                buffer_pool.release(audio)
+                raise _ffmpeg_error(err)
+        return audio
+
+    # Fallback: decode with PyAV (no FFmpeg install required). PyAV only
+    # converts sample format and layout per frame; the rate change is done
+    # once over the whole file.
+    with av.open(path) as input_container:
+        in_stream = input_container.streams.audio[0]
+        in_rate = in_stream.rate or sr
+        converter = av.AudioResampler(format='flt', layout='stereo', rate=in_rate)
+
+        chunks = []
+        for packet in input_container.demux(in_stream):
+            for frame in packet.decode():
+                frame.pts = None
+                chunks.extend(f.to_ndarray().reshape(-1, 2) for f in converter.resample(frame))
+        chunks.extend(f.to_ndarray().reshape(-1, 2) for f in converter.resample(None))
+
+    if not chunks:
+        return buffer_pool.acquire(0)[:0]
+    audio = np.concatenate(chunks)
+    if in_rate != sr:
+        # Polyphase FIR over the whole array in one call
+        g = gcd(sr, in_rate)
+        audio = resample_poly(audio, sr // g, in_rate // g, axis=0).astype(np.float32, copy=False)
+    # Not from the pool, but release() will take it for reuse
+    return audio
+
+def stream_pcm(path, out, sr=SAMPLE_RATE):
+    """Decode `path` with FFmpeg in blocks the size of `out`, a (frames, 2) float32 array.
+
+    Yields views of `out`, refilled in place, so memory use does not depend on
+    the length of the file. Requires FFMPEG.
+    """
+    view = memoryview(out).cast('B')
+    with tempfile.TemporaryFile() as err:
+        proc = _ffmpeg_decoder(path, sr, err)
+        finished = False
+        try:
+            while True:
+                filled = 0
+                while filled < len(view):
+                    n = proc.stdout.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+                if filled:
+                    yield out[:filled // 8]
+                if filled < len(view):
+                    break
+            finished = True
+        finally:
+            # EOF can arrive while FFmpeg is still exiting, so only an early stop kills it
+            if not finished and proc.poll() is None:
+                proc.kill()  # The consumer stopped early
+            proc.stdout.close()
+            proc.wait()
+        if proc.returncode != 0:
+            raise _ffmpeg_error(err)
+
+def _gated_loudness(segments, step):
+    """Integrated loudness from per-channel K-weighted energies of 100 ms segments."""
+    if len(segments) < 4:
+        return float("-inf")
+    # 400 ms gating blocks with 75% overlap are exactly every run of four
+    # consecutive 100 ms segments, so each segment's energy is summed once.
+    blocks = (segments[:-3] + segments[1:-2] + segments[2:-1] + segments[3:]) / (4 * step)
+
+    # Mean square per block, summed over channels: 1.0 for L/R/C, 1.41 for the surrounds
+    weights = np.ones(blocks.shape[1])
+    weights[3:5] = 1.41
+    power = blocks @ weights
+    with np.errstate(divide="ignore"):
+        block_loudness = -0.691 + 10 * np.log10(power)
+
+    # Absolute gate at -70 LUFS, then relative gate 10 LU below the gated mean
+    gated = block_loudness > -70
+    if not gated.any():
+        return float("-inf")
+    relative_gate = -0.691 + 10 * np.log10(power[gated].mean()) - 10
+    gated &= block_loudness > relative_gate
+    return float(-0.691 + 10 * np.log10(power[gated].mean()))
+
+def _segment_energies(filtered, step):
+    """Sum of squares per channel of each whole `step`-frame segment of `filtered`."""
+    if filtered.ndim == 1:
+        filtered = filtered[:, None]
+    n_segments = len(filtered) // step
+    frames = filtered[:n_segments * step].reshape(n_segments, step, filtered.shape[1])
+    return np.einsum('ijk,ijk->ik', frames, frames)  # No squared copy
+
+def integrated_loudness(data, rate=SAMPLE_RATE):
+    """ITU-R BS.1770 integrated loudness (LUFS) of audio shaped (frames,) or (frames, channels)."""
+    step = rate // 10
+    if len(data) < 4 * step:  # Shorter than one gating block
+        return float("-inf")
+    sos = K_WEIGHTING_SOS if rate == SAMPLE_RATE else k_weighting_sos(rate)
+    return _gated_loudness(_segment_energies(sosfilt(sos, data, axis=0), step), step)
+
+class LoudnessMeter:
+    """Integrated loudness measured block by block, for audio too long to hold in memory.
+
+    feed() consecutive (frames, channels) blocks of any length, then call loudness().
+    Gives the same result as integrated_loudness() over the whole signal.
+    """
+
+    def __init__(self, rate=SAMPLE_RATE, channels=2):
+        self._sos = K_WEIGHTING_SOS if rate == SAMPLE_RATE else k_weighting_sos(rate)
+        self._zi = np.zeros((len(self._sos), 2, channels))  # Filter state carried across blocks
+        self._step = rate // 10
+        self._tail = np.zeros((0, channels))  # Filtered frames short of a whole segment
+        self._segments = []
+
+    def feed(self, block):
+        if not len(block):
+            return
+        if block.ndim == 1:
+            block = block[:, None]
+        filtered, self._zi = sosfilt(self._sos, block, axis=0, zi=self._zi)
+        if len(self._tail):
+            filtered = np.concatenate([self._tail, filtered])
+        segments = _segment_energies(filtered, self._step)
+        self._segments.append(segments)
+        self._tail = filtered[len(segments) * self._step:]
+
+    def loudness(self):
+        if not self._segments:
+            return float("-inf")
+        return _gated_loudness(np.concatenate(self._segments), self._step)
+
+def loudness_normalize_inplace(audio, target_lufs, rate=SAMPLE_RATE):
+    """Scale `audio` to `target_lufs` in place. Returns the measured loudness."""
+    loudness = integrated_loudness(audio, rate)
+    apply_loudness_gain(audio, loudness, target_lufs)
+    return loudness
+
+def apply_loudness_gain(audio, loudness, target_lufs):
+    """Scale `audio` measured at `loudness` LUFS to `target_lufs` in place."""
+    if np.isfinite(loudness):  # Silence: there is no gain that reaches the target
+        gain = 10 ** ((target_lufs - loudness) / 20.0)
+        np.multiply(audio, audio.dtype.type(gain), out=audio)
+        # Boosting quiet input can push peaks past full scale; clip like a
+        # 16-bit WAV would, without another full-size copy
+        np.clip(audio, -1.0, 1.0, out=audio)
+
+def encode_mp3(audio, mp3_path):
+    """Encode a 48 kHz (frames, 2) array to a 320 kbps MP3."""
+    pcm = np.ascontiguousarray(audio, dtype=np.float32)
+
+    if FFMPEG:
+        # Raw PCM straight into a single libmp3lame process via stdin
+        proc = subprocess.Popen(
+            [FFMPEG, "-v", "error", "-y",
+             "-f", "f32le", "-ar", str(SAMPLE_RATE), "-ac", "2", "-i", "pipe:0",
+             "-c:a", "libmp3lame", "-b:a", "320k", mp3_path],
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        # A byte view of the array avoids copying it with tobytes()
+        _, err = proc.communicate(memoryview(pcm).cast('B'))
+        if proc.returncode != 0:
+            raise RuntimeError(err.decode(errors="replace").strip() or "ffmpeg failed")
+        return
+
+    with av.open(mp3_path, mode='w', format='mp3') as output_container:
+        # 320k bitrate = 320000
+        out_stream = output_container.add_stream('mp3', rate=SAMPLE_RATE)
+        out_stream.layout = 'stereo'
+        out_stream.bit_rate = 320000
+
+        # Feed one second at a time; PyAV re-frames for the encoder
+        for start in range(0, len(pcm), SAMPLE_RATE):
+            chunk = pcm[start:start + SAMPLE_RATE]
+            frame = av.AudioFrame.from_ndarray(chunk.reshape(1, -1), format='flt', layout='stereo')
+            frame.sample_rate = SAMPLE_RATE
+            for p in out_stream.encode(frame):
+                output_container.mux(p)
+
+        for p in out_stream.encode(None):
+            output_container.mux(p)
\ No newline at end of file
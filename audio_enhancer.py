@@ -1,88 +1,136 @@
 import os
 import sys
-import time
-import shutil
 import threading
 import signal
 import logging
+import queue
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
+import numpy as np
 import soundfile as sf
-import pyloudnorm as pyln
-import av
+import torch
+from tqdm import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
 
 # --- DeepFilterNet Imports ---
-from df.enhance import enhance, init_df, load_audio, save_audio
+from df.enhance import enhance, init_df
+from df.utils import get_device
+
+from audio_core import (
+    DEFAULT_INPUT_FOLDER, SAMPLE_RATE, SUPPORTED_EXTENSIONS, buffer_pool, decode_to_array,
+    encode_mp3, is_supported, list_audio_files, loudness_normalize_inplace, print_separator,
+    signal_handler,
+)
 
 # ================= CONFIGURATION =================
 TARGET_LOUDNESS = -23
-DEFAULT_INPUT_FOLDER = "Source_Audio"
-SUPPORTED_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac', '.m4a', '.wma', '.aac', '.alac', '.aiff')
 OUTPUT_DIR = "Mastered_Audio_Output"
-TEMP_CONVERT_DIR = "Temp_Conversion_Cache"
 INTERMEDIATE_DIR = "Intermediate_Loudness_Norm"
+MAX_FILES_IN_FLIGHT = 4  # Files decoded/held in memory at once while the pipeline runs
+DF_BATCH_SIZE = 4  # Chunks per DeepFilter forward pass on CUDA (the CPU runs one at a time)
+DF_CHUNK_SECONDS = 10  # DeepFilter processes audio in chunks of this length to bound memory
+DF_QUANTIZE_CPU = False  # Without CUDA, run DeepFilter's GRU/linear layers as int8 (changes the output slightly)
 # =================================================
 
-is_loading = False
+# Context around each DeepFilter chunk, in samples. The pre-roll lets the model's
+# recurrent state settle and is discarded; neighbouring chunks are crossfaded.
+DF_PREROLL = SAMPLE_RATE  # 1 s
+DF_FADE = SAMPLE_RATE // 20  # 50 ms
+DF_LOOKAHEAD = SAMPLE_RATE // 10  # 100 ms of future context, discarded
+DF_FADE_IN = np.linspace(0.0, 1.0, DF_FADE, dtype=np.float32)[:, None]
+
+logger = logging.getLogger("audio_enhancer")
+
 df_model = None
+df_eager_model = None
 df_state = None
-
-def signal_handler(sig, frame):
-    global is_loading
-    is_loading = False
-    print("\n\n" + "!" * 40)
-    print(" Process interrupted by user. Exiting...")
-    print("!" * 40 + "\n")
-    sys.exit(0)
+df_fixed_shapes = False  # Set once a compiled model is running
+df_chunks_per_pass = 1
+_devnull_fd = None
 
 signal.signal(signal.SIGINT, signal_handler)
 
 @contextmanager
 def suppress_output():
-    with open(os.devnull, 'w') as devnull:
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = devnull
-        sys.stderr = devnull
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-
-def print_separator():
-    print("\n" + "=" * 60 + "\n", flush=True)
-
-def spinner(message="Processing"):
-    global is_loading
-    spinner_chars = ["|", "/", "-", "\\"]
-    idx = 0
-    while is_loading:
-        print(f"\r{message}... {spinner_chars[idx % len(spinner_chars)]}", end="", flush=True)
-        idx += 1
-        time.sleep(0.1)
-    print(f"\r{message}... Done!   ", flush=True)
+    """Silence fds 1 and 2, so output from native code (libDF, CUDA) is hidden too."""
+    global _devnull_fd
+    if _devnull_fd is None:
+        _devnull_fd = os.open(os.devnull, os.O_WRONLY)  # Opened once, reused
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    os.dup2(_devnull_fd, 1)
+    os.dup2(_devnull_fd, 2)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for fd, old in zip((1, 2), saved):
+            os.dup2(old, fd)
+            os.close(old)
 
 def init_deepfilter_model():
-    """Initialize the DeepFilterNet model with a spinner for feedback."""
-    global df_model, df_state, is_loading
+    """Initialize the DeepFilterNet model."""
+    global df_model, df_eager_model, df_state, df_chunks_per_pass
     try:
-        is_loading = True
-        t = threading.Thread(target=spinner, args=("Initializing AI Model (this may take a moment)",))
-        t.start()
+        print("Initializing AI Model (this may take a moment)...", end="", flush=True)
         
         logging.getLogger("DF").setLevel(logging.ERROR)
         
         with suppress_output():
             # This is the heavy lifting
             df_model, df_state, _ = init_df()
+            df_eager_model = df_model
+            if get_device().type == "cuda":
+                df_chunks_per_pass = DF_BATCH_SIZE
+                compile_deepfilter_model()
+            elif DF_QUANTIZE_CPU:
+                quantize_deepfilter_model()
             
-        is_loading = False
-        t.join()
+        print(" Done!", flush=True)
     except Exception as e:
-        is_loading = False
         print(f"\nError loading model: {e}", flush=True)
         sys.exit(1)
 
+def compile_deepfilter_model():
+    """Compile the model for CUDA and warm it up; keep the eager model if that fails.
+
+    "reduce-overhead" replays CUDA graphs, which removes the per-frame Python and
+    kernel-launch overhead but needs repeating input shapes. While the compiled
+    model is in use, every forward pass is therefore padded to DF_BATCH_SIZE
+    full-width chunks; the eager model gets batches sized to their content.
+    """
+    global df_model, df_fixed_shapes
+    torch.backends.cudnn.benchmark = True
+    try:
+        df_model = torch.compile(df_eager_model, mode="reduce-overhead")
+        enhance(df_model, df_state, torch.zeros(2 * DF_BATCH_SIZE, _chunk_width()))
+    except Exception:
+        # torch.compile is unsupported on some platforms (e.g. Windows)
+        df_model = df_eager_model
+        return
+    df_fixed_shapes = True
+
+def quantize_deepfilter_model():
+    """Dynamically quantize the model's GRU and linear layers to int8 for CPU inference.
+
+    Weights are stored as int8 and activations are quantized on the fly, so those
+    layers run on the CPU's int8 dot-product units (VNNI on recent x86) instead of
+    float32 FMA. Convolutions stay float32. Keeps the float model if this fails.
+    """
+    global df_model, df_eager_model
+    try:
+        quantized = torch.ao.quantization.quantize_dynamic(
+            df_eager_model, {torch.nn.GRU, torch.nn.Linear}, dtype=torch.qint8
+        )
+        enhance(quantized, df_state, torch.zeros(2, _chunk_width()))
+    except Exception:
+        # No quantized engine for this CPU/build
+        return
+    df_model = df_eager_model = quantized
+
 def get_input_files():
     print("\n[READY] Please specify the audio source:", flush=True)
     print("  > Drag & Drop a folder or file")
@@ -102,175 +150,353 @@ def get_input_files():
     # CASE 1: Default Folder
     if not user_input:
         target_dir = os.path.join(os.getcwd(), DEFAULT_INPUT_FOLDER)
-        if not os.path.exists(target_dir):
+        try:
             os.makedirs(target_dir)
+        except FileExistsError:
+            pass
+        else:
             print_separator()
             print(f"Created default folder: '{DEFAULT_INPUT_FOLDER}'", flush=True)
             print("Please place your audio files inside it and run the script again.")
             print_separator()
 
         
-        for f in os.listdir(target_dir):
-            if f.lower().endswith(SUPPORTED_EXTENSIONS):
-                file_list.append(os.path.join(target_dir, f))
+        file_list = list_audio_files(target_dir)
                 
     # CASE 2: Dragged Directory
     elif os.path.isdir(user_input):
-        for f in os.listdir(user_input):
-            if f.lower().endswith(SUPPORTED_EXTENSIONS):
-                file_list.append(os.path.join(user_input, f))
+        file_list = list_audio_files(user_input)
 
     # CASE 3: Single File
     elif os.path.isfile(user_input):
-        if user_input.lower().endswith(SUPPORTED_EXTENSIONS):
+        if is_supported(user_input):
             file_list.append(user_input)
         else:
             print(f"\nError: File format not supported. Supported: {SUPPORTED_EXTENSIONS}")
             
     return file_list
 
-def prepare_working_dirs():
-    for d in [OUTPUT_DIR, TEMP_CONVERT_DIR, INTERMEDIATE_DIR]:
-        if not os.path.exists(d):
-            os.makedirs(d)
+def prepare_working_dirs(keep_normalized):
+    # Audio is passed between stages in memory; INTERMEDIATE_DIR only holds
+    # the optional normalized copies
+    dirs = [OUTPUT_DIR, INTERMEDIATE_DIR] if keep_normalized else [OUTPUT_DIR]
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
 
 def convert_to_wav(file_path):
-    global is_loading
+    """Decode the input to 48 kHz stereo float32 PCM, kept in memory."""
     filename = os.path.basename(file_path)
-    wav_path = os.path.join(TEMP_CONVERT_DIR, os.path.splitext(filename)[0] + ".wav")
-    
     try:
-        is_loading = True
-        t = threading.Thread(target=spinner, args=(f"Converting {filename}",))
-        t.start()
-        
-        with av.open(file_path) as input_container:
-            in_stream = input_container.streams.audio[0]
-            
-            with av.open(wav_path, mode='w', format='wav') as output_container:
-                out_stream = output_container.add_stream('pcm_s16le', rate=48000)
-                out_stream.layout = 'stereo'
-                
-                # Resampler to ensure 48k
-                resampler = av.AudioResampler(format='s16', layout='stereo', rate=48000)
-
-                for packet in input_container.demux(in_stream):
-                    for frame in packet.decode():
-                        frame.pts = None
-                        out_frames = resampler.resample(frame)
-                        for out_frame in out_frames:
-                            for packet in out_stream.encode(out_frame):
-                                output_container.mux(packet)
-                
-                for packet in out_stream.encode(None):
-                    output_container.mux(packet)
-
-        is_loading = False
-        t.join()
-        return wav_path
+        return decode_to_array(file_path)
     except Exception as e:
-        is_loading = False
-        t.join()
-        print(f"\nError converting {filename}: {e}")
+        logger.error("Error converting %s: %s", filename, e)
         return None
 
-def normalize_loudness(input_file):
-    global is_loading
-    filename = os.path.basename(input_file)
-    output_path = os.path.join(INTERMEDIATE_DIR, filename)
+def normalize_loudness(audio):
+    """Scale `audio` to TARGET_LOUDNESS in place and return it."""
     try:
-        is_loading = True
-        t = threading.Thread(target=spinner, args=("Normalizing Loudness",))
-        t.start()
-        data, rate = sf.read(input_file)
-        meter = pyln.Meter(rate)
-        loudness = meter.integrated_loudness(data)
-        normalized_audio = pyln.normalize.loudness(data, loudness, TARGET_LOUDNESS)
-        sf.write(output_path, normalized_audio, rate)
-        is_loading = False
-        t.join()
-        return output_path
+        loudness_normalize_inplace(audio, TARGET_LOUDNESS)
+        return audio
     except Exception as e:
-        is_loading = False
+        logger.error("Error normalizing loudness: %s", e)
         return None
 
-def run_deepfilter(input_file):
-    global is_loading, df_model, df_state
-    base_name = os.path.basename(input_file)
-    output_path = os.path.join(OUTPUT_DIR, base_name)
+def save_normalized(audio, original_filename):
+    """Keep a copy of the normalized (pre-enhancement) audio in INTERMEDIATE_DIR."""
+    filename = os.path.splitext(original_filename)[0] + ".wav"
     try:
-        is_loading = True
-        t = threading.Thread(target=spinner, args=("Enhancing Audio (DeepFilter)",))
-        t.start()
-        with suppress_output():
-            audio, _ = load_audio(input_file, sr=df_state.sr())
-            enhanced_audio = enhance(df_model, df_state, audio)
-            save_audio(output_path, enhanced_audio, df_state.sr())
-        is_loading = False
-        t.join()
-        return output_path if os.path.exists(output_path) else None
+        sf.write(os.path.join(INTERMEDIATE_DIR, filename), audio, SAMPLE_RATE)
     except Exception as e:
-        is_loading = False
-        return None
+        logger.error("Error saving normalized copy of %s: %s", original_filename, e)
+
+def _chunk_width():
+    """Model input width of one full chunk, including its context."""
+    return DF_PREROLL + DF_CHUNK_SECONDS * SAMPLE_RATE + DF_FADE + DF_LOOKAHEAD
 
-def convert_to_final_mp3(wav_file, original_filename):
-    global is_loading
+def _run_model(batch):
+    """One `enhance` call; `enhance` treats the first axis as the batch."""
+    global df_model, df_fixed_shapes
     try:
-        is_loading = True
-        t = threading.Thread(target=spinner, args=("Finalizing to .mp3",))
-        t.start()
-        
-        name_no_ext = os.path.splitext(original_filename)[0]
-        mp3_path = os.path.join(OUTPUT_DIR, f"{name_no_ext}.mp3")
-        
-        with av.open(wav_file) as input_container:
-            in_stream = input_container.streams.audio[0]
-            
-            with av.open(mp3_path, mode='w', format='mp3') as output_container:
-                # 320k bitrate = 320000
-                out_stream = output_container.add_stream('mp3', rate=in_stream.rate)
-                out_stream.bit_rate = 320000 
-                
-                for packet in input_container.demux(in_stream):
-                    for frame in packet.decode():
-                        frame.pts = None
-                        for p in out_stream.encode(frame):
-                            output_container.mux(p)
-                
-                for p in out_stream.encode(None):
-                    output_container.mux(p)
+        return enhance(df_model, df_state, batch).numpy()
+    except Exception:
+        if df_model is df_eager_model:
+            raise
+        # A new shape failed to compile: stay on the eager model from now on
+        df_model = df_eager_model
+        df_fixed_shapes = False
+        return enhance(df_model, df_state, batch).numpy()
+
+def _enhance_chunks(audios):
+    """Run DeepFilter over one or more (frames, 2) arrays, one chunk at a time.
+
+    Each file is cut into DF_CHUNK_SECONDS chunks, so the model's activations
+    stay the same size no matter how long the file is. Every chunk carries
+    DF_PREROLL of earlier audio (zeros at the start of the file) and
+    DF_LOOKAHEAD of later audio; both are dropped from the output, and
+    consecutive chunks are crossfaded over DF_FADE. Chunks from all files are
+    stacked along the batch axis, up to DF_BATCH_SIZE per pass on CUDA.
+    """
+    chunk = DF_CHUNK_SECONDS * SAMPLE_RATE
+
+    jobs = []  # (file index, chunk start, samples of real audio after start)
+    for i, audio in enumerate(audios):
+        for start in range(0, len(audio), chunk):
+            jobs.append((i, start, min(len(audio), start + chunk + DF_FADE + DF_LOOKAHEAD) - start))
+    outputs = [np.empty((len(a), 2), dtype=np.float32) for a in audios]
+
+    for first in range(0, len(jobs), df_chunks_per_pass):
+        group = jobs[first:first + df_chunks_per_pass]
+        if df_fixed_shapes:
+            rows, width = 2 * df_chunks_per_pass, _chunk_width()
+        else:
+            rows, width = 2 * len(group), DF_PREROLL + max(n for _, _, n in group)
+
+        batch = torch.zeros((rows, width))
+        for j, (i, start, n) in enumerate(group):
+            lo = max(0, start - DF_PREROLL)
+            segment = audios[i][lo:start + n]
+            offset = DF_PREROLL - (start - lo)
+            batch[2 * j:2 * j + 2, offset:offset + len(segment)] = torch.from_numpy(segment.T)
+        enhanced = _run_model(batch)
+
+        for j, (i, start, n) in enumerate(group):
+            # Keep the chunk plus the fade into the next one; drop pre-roll and lookahead
+            y = enhanced[2 * j:2 * j + 2, DF_PREROLL:DF_PREROLL + min(n, chunk + DF_FADE)].T
+            out = outputs[i]
+            fade = min(DF_FADE, len(y)) if start else 0
+            if fade:
+                w = DF_FADE_IN[:fade]
+                out[start:start + fade] = out[start:start + fade] * (1 - w) + y[:fade] * w
+            out[start + fade:start + len(y)] = y[fade:]
+
+    return outputs
+
+def run_deepfilter(audio):
+    """Enhance a (frames, 2) array with DeepFilter and return the enhanced array."""
+    try:
+        # The pipeline already runs at the model's 48 kHz, so the array goes
+        # straight in -- no load_audio()/save_audio() round-trip through disk.
+        # No suppress_output() here: swapping sys.stdout from a worker thread
+        # would also swallow the progress lines printed by the main thread.
+        return _enhance_chunks([audio])[0]
+    except Exception as e:
+        logger.error("Error enhancing audio: %s", e)
+        return None
 
-        try:
-            os.remove(wav_file)
-        except:
-            pass
+def run_deepfilter_batch(audios):
+    """Enhance several arrays, sharing DeepFilter forward passes between them.
 
-        is_loading = False
-        t.join()
+    Returns one enhanced array (or None) per input.
+    """
+    if len(audios) == 1:
+        return [run_deepfilter(audios[0])]
+
+    try:
+        return _enhance_chunks(audios)
+    except Exception:
+        # e.g. out of GPU memory: retry one file at a time so a single bad
+        # input does not fail the whole batch
+        return [run_deepfilter(a) for a in audios]
+
+class DeepFilterWorker:
+    """Single thread that owns the DeepFilter model.
+
+    Files queued while the model is busy are picked up together, up to
+    `batch_size` per forward pass. Leaving the `with` block on an exception
+    cancels the files still waiting, so only the pass already running finishes.
+    """
+
+    def __init__(self, batch_size):
+        self._batch_size = batch_size
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._closed = True
+        if exc_type is not None:
+            # e.g. Ctrl+C: drop the queued files instead of enhancing them all first
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[1].cancel()
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, audio):
+        future = Future()
+        if self._closed:
+            future.cancel()
+        else:
+            self._queue.put((audio, future))
+        return future
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # Never wait for a batch to fill up: only take what is already queued
+            while len(batch) < self._batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            audios = [a for a, _ in batch]
+            try:
+                results = run_deepfilter_batch(audios)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+def convert_to_final_mp3(audio, original_filename):
+    """Encode the enhanced (frames, 2) array to a 320 kbps MP3 in OUTPUT_DIR."""
+    try:
+        name_no_ext = os.path.splitext(original_filename)[0]
+        encode_mp3(audio, os.path.join(OUTPUT_DIR, f"{name_no_ext}.mp3"))
         return True
     except Exception as e:
-        is_loading = False
-        t.join()
-        print(f"\nError creating MP3: {e}")
+        logger.error("Error creating MP3 for %s: %s", original_filename, e)
         return False
+
+PIPELINE_STAGES = 4  # decode, normalize, enhance, mp3
+
+def _then(stage_future, on_result, done, advance):
+    """Hand the result of one pipeline stage to the next one when it is ready.
+
+    A None/False result (the stage already reported its error) or an exception
+    ends the file early by resolving its `done` future.
+    """
+    def _next(future):
+        try:
+            result = future.result()
+            if result is None or result is False:
+                done.set_result(False)
+            else:
+                advance()
+                on_result(result)
+        except Exception as e:
+            done.set_exception(e)
+
+    stage_future.add_done_callback(_next)
+
+def _start_file(pools, file_path, keep_normalized, pbar):
+    """Chain decode -> normalize -> enhance -> mp3 for one file. Returns its `done` future."""
+    io_pool, norm_pool, df_worker = pools
+    original_filename = os.path.basename(file_path)
+    done = Future()
+    stages_done = 0
+
+    def advance():
+        nonlocal stages_done
+        stages_done += 1
+        pbar.update(1)
+
+    def finish(_):
+        # Stages skipped after a failure still count, so the bar reaches 100%
+        pbar.update(PIPELINE_STAGES - stages_done)
+
+    done.add_done_callback(finish)
+
+    def normalize(audio):
+        normalized = normalize_loudness(audio)
+        # Saved here rather than on the I/O pool: the buffer is recycled as
+        # soon as DeepFilter is done with it.
+        if normalized is not None and keep_normalized:
+            save_normalized(normalized, original_filename)
+        return normalized
+
+    def to_normalize(audio):
+        _then(norm_pool.submit(normalize, audio), to_enhance, done, advance)
+
+    def to_enhance(normalized):
+        _then(df_worker.submit(normalized), lambda enhanced: to_mp3(normalized, enhanced), done, advance)
+
+    def to_mp3(normalized, enhanced):
+        # DeepFilter has its own copy of the audio now; recycle the decode buffer
+        buffer_pool.release(normalized)
+        _then(io_pool.submit(convert_to_final_mp3, enhanced, original_filename), done.set_result, done, advance)
+
+    _then(io_pool.submit(convert_to_wav, file_path), to_normalize, done, advance)
+    return done
+
+def process_batch(files_to_process, keep_normalized):
+    """Process a batch with the stages of different files overlapping.
+
+    While DeepFilter enhances one file, the next ones are already being decoded
+    and normalized. At most MAX_FILES_IN_FLIGHT files are in progress, and
+    results are reported in input order. A single progress bar advances as
+    each stage of each file completes.
+    """
+    def report(original_filename, done):
+        try:
+            ok = done.result()
+        except Exception as e:
+            logger.error("Error processing %s: %s", original_filename, e)
+            ok = False
+        if ok:
+            pbar.write(f"Success: {original_filename}")
+        else:
+            logger.warning("Failed: %s", original_filename)
+
+    # FFmpeg encode/decode runs out of process and numpy/soundfile release the GIL,
+    # so threads are enough. DeepFilter gets a single worker: the model is not thread-safe.
+    # Batching only pays off on the GPU; on the CPU it just multiplies peak memory.
+    df_batch_size = DF_BATCH_SIZE if get_device().type == "cuda" else 1
+    io_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+    norm_pool = ThreadPoolExecutor(max_workers=2)
+    with tqdm(total=len(files_to_process) * PIPELINE_STAGES, desc="Pipeline") as pbar, \
+            logging_redirect_tqdm():
+        try:
+            with DeepFilterWorker(df_batch_size) as df_worker:
+                pools = (io_pool, norm_pool, df_worker)
+                in_flight = deque()
+
+                for file_path in files_to_process:
+                    if len(in_flight) >= MAX_FILES_IN_FLIGHT:
+                        report(*in_flight.popleft())
+                    done = _start_file(pools, file_path, keep_normalized, pbar)
+                    in_flight.append((os.path.basename(file_path), done))
+
+                # Drain before the executors shut down: later stages are submitted from callbacks
+                while in_flight:
+                    report(*in_flight.popleft())
+        finally:
+            # After a normal drain both pools are idle; on Ctrl+C the queued stages are dropped
+            norm_pool.shutdown(cancel_futures=True)
+            io_pool.shutdown(cancel_futures=True)
         
+
 def cleanup_folders(keep_normalized):
-    if os.path.exists(TEMP_CONVERT_DIR):
-        shutil.rmtree(TEMP_CONVERT_DIR, ignore_errors=True)
-    if not keep_normalized and os.path.exists(INTERMEDIATE_DIR):
-        shutil.rmtree(INTERMEDIATE_DIR, ignore_errors=True)
-    else:
+    # Nothing temporary is written to disk, so there is nothing to remove
+    if keep_normalized:
         print(f"Normalized audio files saved in: {INTERMEDIATE_DIR}")
 
 def main():
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
     try:
         print_separator()
         print("      PROFESSIONAL AUDIO MASTERING V2", flush=True)
         print("      (Supports: .ogg, .flac, .wav, .mp3 -> Output: .mp3)", flush=True)
         print_separator()
 
-        prepare_working_dirs()
-        
         init_deepfilter_model()
 
         while True:
@@ -288,22 +514,8 @@ def main():
 
             print_separator()
 
-            for i, file_path in enumerate(files_to_process):
-                original_filename = os.path.basename(file_path)
-                print(f"[{i+1}/{len(files_to_process)}] Processing: {original_filename}", flush=True)
-
-                wav_file = convert_to_wav(file_path)
-                if not wav_file: continue
-
-                norm_file = normalize_loudness(wav_file)
-                if not norm_file: continue
-
-                enhanced_wav = run_deepfilter(norm_file)
-                if enhanced_wav:
-                    if convert_to_final_mp3(enhanced_wav, original_filename):
-                        print(f"Success: {original_filename}", flush=True)
-                
-                print("-" * 30, flush=True)
+            prepare_working_dirs(keep_normalized)
+            process_batch(files_to_process, keep_normalized)
 
             cleanup_folders(keep_normalized)
             print_separator()
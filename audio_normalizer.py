@@ -1,21 +1,45 @@
 import os
 import sys
-import time
 import shutil
-import threading
 import signal
-import av  # PyAV
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+import numpy as np
 import soundfile as sf
-import pyloudnorm as pyln
+from tqdm import tqdm
+
+from audio_core import (
+    DEFAULT_INPUT_FOLDER, FFMPEG, SAMPLE_RATE, LoudnessMeter, apply_loudness_gain, buffer_pool,
+    decode_to_array, integrated_loudness, is_supported, list_audio_files, print_separator, probe,
+    signal_handler, stream_pcm,
+)
 
 # ================= CONFIGURATION =================
 # Folders
-DEFAULT_INPUT_FOLDER = "Source_Audio"
 OUTPUT_DIR = "Normalized_Audio_Output"
-TEMP_DIR = "Temp_Conversion_Cache"
 
-# Supported Input Formats
-SUPPORTED_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac', '.m4a', '.wma', '.aac', '.alac', '.aiff')
+# Output: 16-bit "wav", or "flac" for lossless files about half the size
+OUTPUT_FORMAT = "wav"
+
+# Measured loudness of each source file, kept across runs so re-normalizing
+# to a different target only has to apply the gain. Kept next to the script,
+# out of OUTPUT_DIR, so it is not delivered with the normalized files.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+LOUDNESS_CACHE = os.path.join(CACHE_DIR, "lufs_cache.db")
+
+# Files normalized in parallel, each in its own process. With 1, files are
+# normalized on IO_THREADS threads in this process instead.
+MAX_WORKERS = os.cpu_count() or 1
+IO_THREADS = min(32, (os.cpu_count() or 1) + 4)
+
+# Files are read, normalized and written this many seconds at a time
+BLOCK_SECONDS = 10
+
+# Inputs already this close to the target (in LU) are passed through without gain
+LOUDNESS_TOLERANCE = 0.1
 
 # Loudness Presets
 LOUDNESS_PRESETS = {
@@ -25,34 +49,8 @@ LOUDNESS_PRESETS = {
 }
 # =================================================
 
-# Global flag for UI spinner
-is_loading = False
-
-# Handle Ctrl+C gracefully
-def signal_handler(sig, frame):
-    global is_loading
-    is_loading = False
-    print("\n\n" + "!" * 40)
-    print(" Process interrupted by user. Exiting...")
-    print("!" * 40 + "\n")
-    sys.exit(0)
-
 signal.signal(signal.SIGINT, signal_handler)
 
-def print_separator():
-    print("\n" + "=" * 60 + "\n")
-
-def spinner(message="Processing"):
-    """Display a loading spinner."""
-    global is_loading
-    spinner_chars = ["|", "/", "-", "\\"]
-    idx = 0
-    while is_loading:
-        print(f"\r{message}... {spinner_chars[idx % len(spinner_chars)]}", end="", flush=True)
-        idx += 1
-        time.sleep(0.1)
-    print(f"\r{message}... Done!   ")
-
 def get_target_loudness():
     """Ask user to select a loudness target."""
     print("Select Target Loudness:")
@@ -98,24 +96,23 @@ def get_input_files():
     # CASE 1: Default Folder
     if not user_input:
         target_dir = os.path.join(os.getcwd(), DEFAULT_INPUT_FOLDER)
-        if not os.path.exists(target_dir):
+        try:
             os.makedirs(target_dir)
+        except FileExistsError:
+            pass
+        else:
             print("Created default folder. Please add files and run again.")
             return []
         
-        for f in os.listdir(target_dir):
-            if f.lower().endswith(SUPPORTED_EXTENSIONS):
-                file_list.append(os.path.join(target_dir, f))
+        file_list = list_audio_files(target_dir)
                 
     # CASE 2: Dragged Directory
     elif os.path.isdir(user_input):
-        for f in os.listdir(user_input):
-            if f.lower().endswith(SUPPORTED_EXTENSIONS):
-                file_list.append(os.path.join(user_input, f))
+        file_list = list_audio_files(user_input)
 
     # CASE 3: Single File
     elif os.path.isfile(user_input):
-        if user_input.lower().endswith(SUPPORTED_EXTENSIONS):
+        if is_supported(user_input):
             file_list.append(user_input)
             
     else:
@@ -125,87 +122,164 @@ def get_input_files():
     return file_list
 
 def prepare_working_dirs():
-    """Create output and temp directories."""
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-    if not os.path.exists(TEMP_DIR):
-        os.makedirs(TEMP_DIR)
-
-def convert_to_wav(file_path):
-    """Convert input to WAV using PyAV (if not already WAV)."""
-    global is_loading
-    filename = os.path.basename(file_path)
-    wav_path = os.path.join(TEMP_DIR, os.path.splitext(filename)[0] + ".wav")
-    
-    if file_path.lower().endswith(".wav"):
-        return file_path
-
+    """Create the output and cache directories."""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     try:
-        is_loading = True
-        t = threading.Thread(target=spinner, args=(f"Converting {filename}",))
-        t.start()
-        
-        with av.open(file_path) as input_container:
-            in_stream = input_container.streams.audio[0]
-            with av.open(wav_path, mode='w', format='wav') as output_container:
-                out_stream = output_container.add_stream('pcm_s16le', rate=48000)
-                out_stream.layout = 'stereo'
-                resampler = av.AudioResampler(format='s16', layout='stereo', rate=48000)
-
-                for packet in input_container.demux(in_stream):
-                    for frame in packet.decode():
-                        frame.pts = None
-                        out_frames = resampler.resample(frame)
-                        for out_frame in out_frames:
-                            for packet in out_stream.encode(out_frame):
-                                output_container.mux(packet)
-                for packet in out_stream.encode(None):
-                    output_container.mux(packet)
-
-        is_loading = False
-        t.join()
-        return wav_path
-
-    except Exception as e:
-        is_loading = False
-        t.join()
-        print(f"\nError converting {filename}: {e}")
-        return None
-
-def normalize_loudness(input_file, original_filename, target_lufs):
-    """Measure and normalize loudness to target_lufs."""
-    global is_loading
-    
+        os.makedirs(CACHE_DIR, exist_ok=True)
+    except OSError:
+        pass  # The cache is only an optimization
+
+_local = threading.local()  # Per-thread SQLite connection to LOUDNESS_CACHE
+
+def cache_key(file_path):
+    """Identify a source file by the hash of its first MB, its size and its mtime."""
+    h = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        h.update(f.read(1 << 20))
+    st = os.stat(file_path)
+    return f"{h.hexdigest()}-{st.st_size}-{int(st.st_mtime)}"
+
+def cached_loudness(file_path, measure):
+    """Loudness of `file_path` from LOUDNESS_CACHE, or call measure() and store the result."""
+    key = None
+    try:
+        db = getattr(_local, "db", None)
+        if db is None:
+            # SQLite serializes writes from other threads and worker processes
+            db = _local.db = sqlite3.connect(LOUDNESS_CACHE, timeout=30)
+            db.execute("CREATE TABLE IF NOT EXISTS lufs (key TEXT PRIMARY KEY, loudness REAL)")
+        key = cache_key(file_path)
+        row = db.execute("SELECT loudness FROM lufs WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return row[0]
+    except (OSError, sqlite3.Error):
+        pass  # The cache is only an optimization
+
+    loudness = measure()
+    if key is not None:
+        try:
+            with db:
+                db.execute("INSERT OR REPLACE INTO lufs VALUES (?, ?)", (key, loudness))
+        except sqlite3.Error:
+            pass
+    return loudness
+
+def normalize_streaming(file_path, output_path, target_lufs):
+    """Normalize a file libsndfile reads, BLOCK_SECONDS at a time. Returns the original loudness.
+
+    One pass measures, a second applies the gain and writes, so memory use does
+    not grow with the length of the file.
+    """
+    with sf.SoundFile(file_path) as f:
+        block = np.empty((f.samplerate * BLOCK_SECONDS, f.channels), dtype=np.float32)
+
+        def measure():
+            meter = LoudnessMeter(f.samplerate, f.channels)
+            for chunk in f.blocks(out=block):
+                meter.feed(chunk)
+            f.seek(0)
+            return meter.loudness()
+
+        loudness_before = cached_loudness(file_path, measure)
+        on_target = abs(loudness_before - target_lufs) < LOUDNESS_TOLERANCE
+        if on_target and f.format == OUTPUT_FORMAT.upper() and f.subtype == 'PCM_16':
+            # Already normalized and in the output format: copy the bytes as they are
+            shutil.copyfile(file_path, output_path)
+            return loudness_before
+
+        with sf.SoundFile(output_path, 'w', f.samplerate, f.channels,
+                          format=OUTPUT_FORMAT.upper(), subtype='PCM_16') as out:
+            for chunk in f.blocks(out=block):
+                if not on_target:
+                    apply_loudness_gain(chunk, loudness_before, target_lufs)
+                out.write(chunk)
+    return loudness_before
+
+def normalize_piped(file_path, output_path, target_lufs):
+    """Normalize a file FFmpeg decodes, BLOCK_SECONDS at a time. Returns the original loudness.
+
+    Like normalize_streaming, but both passes read a 48 kHz stereo FFmpeg pipe,
+    so the decode runs twice instead of holding the whole file in memory.
+    """
+    block = np.empty((SAMPLE_RATE * BLOCK_SECONDS, 2), dtype=np.float32)
+
+    def measure():
+        meter = LoudnessMeter()
+        for chunk in stream_pcm(file_path, block):
+            meter.feed(chunk)
+        return meter.loudness()
+
+    loudness_before = cached_loudness(file_path, measure)
+    on_target = abs(loudness_before - target_lufs) < LOUDNESS_TOLERANCE
+    with sf.SoundFile(output_path, 'w', SAMPLE_RATE, 2,
+                      format=OUTPUT_FORMAT.upper(), subtype='PCM_16') as out:
+        for chunk in stream_pcm(file_path, block):
+            if not on_target:
+                apply_loudness_gain(chunk, loudness_before, target_lufs)
+            out.write(chunk)
+    return loudness_before
+
+def normalize_decoded(file_path, output_path, target_lufs):
+    """Decode to 48 kHz stereo in memory with PyAV and normalize. Returns the original loudness."""
+    audio = decode_to_array(file_path)
+    try:
+        loudness_before = cached_loudness(file_path, lambda: integrated_loudness(audio))
+        if abs(loudness_before - target_lufs) >= LOUDNESS_TOLERANCE:
+            apply_loudness_gain(audio, loudness_before, target_lufs)
+        sf.write(output_path, audio, SAMPLE_RATE, format=OUTPUT_FORMAT.upper(), subtype='PCM_16')
+    finally:
+        buffer_pool.release(audio)
+    return loudness_before
+
+def init_worker():
+    """Runs in each worker process: leave Ctrl+C and all output to the main process."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Workers have no progress bar to print around; errors are returned to the
+    # parent, and decoder notes from native code would land in the bar's line.
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    os.close(devnull)
+
+def process_one(file_path, target_lufs):
+    """Normalize one file. Returns (filename, loudness before or None, error message or None)."""
+    original_filename = os.path.basename(file_path)
     name_no_ext = os.path.splitext(original_filename)[0]
-    output_path = os.path.join(OUTPUT_DIR, f"{name_no_ext}_Normalized.wav")
-
+    output_path = os.path.join(OUTPUT_DIR, f"{name_no_ext}_Normalized.{OUTPUT_FORMAT}")
     try:
-        is_loading = True
-        t = threading.Thread(target=spinner, args=("Analyzing & Normalizing",))
-        t.start()
-
-        data, rate = sf.read(input_file)
-        meter = pyln.Meter(rate) 
-        loudness_before = meter.integrated_loudness(data)
-        
-        normalized_audio = pyln.normalize.loudness(data, loudness_before, target_lufs)
-        sf.write(output_path, normalized_audio, rate)
-        
-        is_loading = False
-        t.join()
-        
-        print(f"Loudness: {loudness_before:.2f} -> {target_lufs:.2f} LUFS")
-        return True
+        # Formats libsndfile reads itself (wav, flac, ogg, aiff, ...) are streamed at
+        # their own rate; the meter handles any rate, so there is nothing to resample.
+        if probe(file_path) is not None:
+            return original_filename, normalize_streaming(file_path, output_path, target_lufs), None
+        if FFMPEG:
+            return original_filename, normalize_piped(file_path, output_path, target_lufs), None
+        return original_filename, normalize_decoded(file_path, output_path, target_lufs), None
     except Exception as e:
-        is_loading = False
-        t.join()
-        print(f"\nError processing {original_filename}: {e}")
+        # Printed by the parent: a worker process cannot write around its progress bar
+        return original_filename, None, str(e)
+
+def report(pbar, original_filename, loudness_before, error, target_lufs):
+    """Print the outcome of one file above the progress bar; True if it succeeded."""
+    pbar.update()
+    if error is not None:
+        pbar.write(f"Error processing {original_filename}: {error}")
+    if loudness_before is None:
+        pbar.write(f"Failed: {original_filename}")
         return False
+    pbar.write(f"{original_filename}: {loudness_before:.2f} -> {target_lufs:.2f} LUFS")
+    return True
 
-def cleanup_temp():
-    if os.path.exists(TEMP_DIR):
-        try: shutil.rmtree(TEMP_DIR)
-        except: pass
+def _run_batch(executor, files_to_process, target_lufs):
+    """Normalize files on `executor`, reported in input order. Returns the number that succeeded."""
+    success_count = 0
+    try:
+        results = executor.map(process_one, files_to_process, repeat(target_lufs))
+        with tqdm(total=len(files_to_process), desc="Normalizing", unit="file") as pbar:
+            for original_filename, loudness_before, error in results:
+                success_count += report(pbar, original_filename, loudness_before, error, target_lufs)
+    finally:
+        executor.shutdown(cancel_futures=True)
+    return success_count
 
 def main():
     try:
@@ -233,23 +307,15 @@ def main():
             print_separator()
 
             # 3. Process Loop
-            success_count = 0
-            for i, file_path in enumerate(files_to_process):
-                original_filename = os.path.basename(file_path)
-                print(f"[{i+1}/{len(files_to_process)}] Processing: {original_filename}")
-
-                wav_file = convert_to_wav(file_path)
-                
-                if wav_file:
-                    if normalize_loudness(wav_file, original_filename, target_lufs):
-                        success_count += 1
-                        print("Status: Success")
-                    else:
-                        print("Status: Failed")
-                
-                print("-" * 30)
-
-            cleanup_temp()
+            workers = min(MAX_WORKERS, len(files_to_process))
+            if workers > 1:
+                # Files are independent: one per worker process
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+            else:
+                # libsndfile, the decoder and numpy release the GIL, so on threads
+                # reading one file overlaps with measuring and writing another
+                executor = ThreadPoolExecutor(max_workers=IO_THREADS)
+            success_count = _run_batch(executor, files_to_process, target_lufs)
             
             print_separator()
             print(f"Completed {success_count}/{len(files_to_process)} files.")